@@ -2,46 +2,113 @@
 Admin commands for Discord bot management
 """
 
+import heapq
 import logging
 import json
+import time
+from functools import lru_cache
 import discord
 from discord.ext import commands
-from typing import Optional
-from bot.db import get_collection  # <-- Add this import
+from typing import Dict, Optional
+from bot.db import queue_channel_update
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=128)
+def _compile(src: str):
+    """Compile an eval snippet, reusing the code object for repeated snippets"""
+    return compile(src, "<admin-eval>", "eval")
+
+# Commands in this cog that anyone may use
+PUBLIC_COMMANDS = frozenset({"invite"})
+
+_ADMIN_ONLY = "Only the bot admin can use this command!"
+
+# Seconds before a non-admin is told again that a command is admin-only
+UNAUTHORIZED_REPLY_COOLDOWN = 60
+
+class AdminOnly(commands.CheckFailure):
+    """Raised when a non-admin invokes an admin command"""
+    
+    def __init__(self, silent: bool = False):
+        super().__init__(_ADMIN_ONLY)
+        # Set when the user was already told recently and no reply should be sent
+        self.silent = silent
+
 class AdminCommands(commands.Cog):
     """Admin-only commands for bot management"""
     
     def __init__(self, bot):
         self.bot = bot
+        self._admins = frozenset({bot.config.admin_user_id})
+        self._invite_url: Optional[str] = None
+        self._unauthorized_offenders: Dict[int, float] = {}
+        
+        # Static response embeds, built once and reused for every send
+        self._unset_channel_embed = discord.Embed(
+            title="✅ Chat Channel Restriction Removed",
+            description="Bot will now respond to mentions and DMs only",
+            color=discord.Color.blue()
+        )
+        self._clear_all_embed = discord.Embed(
+            title="🗑️ All Chat History Cleared",
+            description="All conversation histories have been reset",
+            color=discord.Color.red()
+        )
+        self._shutdown_embed = discord.Embed(
+            title="🛑 Bot Shutting Down",
+            description="Bot is shutting down gracefully...",
+            color=discord.Color.red()
+        )
         
     def is_admin(self, user_id: int) -> bool:
         """Check if user is the bot admin"""
-        return user_id == self.bot.config.admin_user_id
+        return user_id in self._admins
+    
+    async def cog_check(self, ctx: commands.Context) -> bool:
+        """Restrict every non-public command in this cog to the bot admin"""
+        if ctx.author.id in self._admins or ctx.command.name in PUBLIC_COMMANDS:
+            return True
+        
+        now = time.monotonic()
+        last_reply = self._unauthorized_offenders.get(ctx.author.id)
+        if last_reply is not None and now - last_reply < UNAUTHORIZED_REPLY_COOLDOWN:
+            raise AdminOnly(silent=True)
+        
+        # Forget users whose cooldown has passed so the map doesn't grow for the life of the process
+        offenders = self._unauthorized_offenders
+        stale = [user_id for user_id, ts in offenders.items() if now - ts >= UNAUTHORIZED_REPLY_COOLDOWN]
+        for user_id in stale:
+            del offenders[user_id]
+        offenders[ctx.author.id] = now
+        raise AdminOnly()
+    
+    @property
+    def invite_url(self) -> str:
+        """Bot invite link, generated once the bot user is known"""
+        if self._invite_url is None:
+            permissions = discord.Permissions()
+            permissions.send_messages = True
+            permissions.read_messages = True
+            permissions.read_message_history = True
+            permissions.embed_links = True
+            permissions.add_reactions = True
+            
+            self._invite_url = discord.utils.oauth_url(self.bot.user.id, permissions=permissions)
+        return self._invite_url
     
     @commands.command(name="setchannel")
     async def set_chat_channel(self, ctx: commands.Context, channel: discord.TextChannel = None):
         """Set the main chat channel for the bot (Admin only)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
         if channel is None:
             channel = ctx.channel
         
         # Update the bot's chat channel
         self.bot.config.chat_channel_id = channel.id
         
-        # Save to MongoDB for persistence
-        channels = get_collection("channels")
+        # Queue a MongoDB write for persistence
         if ctx.guild:
-            channels.update_one(
-                {"guild_id": ctx.guild.id},
-                {"$set": {"guild_id": ctx.guild.id, "channel_id": channel.id}},
-                upsert=True
-            )
+            queue_channel_update(ctx.guild.id, channel.id)
         
         embed = discord.Embed(
             title="✅ Chat Channel Updated",
@@ -56,28 +123,19 @@ class AdminCommands(commands.Cog):
     @commands.command(name="unsetchannel")
     async def unset_chat_channel(self, ctx: commands.Context):
         """Remove specific chat channel restriction (Admin only)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
         self.bot.config.chat_channel_id = None
         
-        embed = discord.Embed(
-            title="✅ Chat Channel Restriction Removed",
-            description="Bot will now respond to mentions and DMs only",
-            color=discord.Color.blue()
-        )
-        await ctx.send(embed=embed)
+        # Persist the unset too, so other instances (and replayed change events) see it
+        if ctx.guild:
+            queue_channel_update(ctx.guild.id, None)
+        
+        await ctx.send(embed=self._unset_channel_embed, allowed_mentions=discord.AllowedMentions.none())
         
         logger.info(f"Admin {ctx.author} removed chat channel restriction")
     
     @commands.command(name="setprefix")
     async def set_prefix(self, ctx: commands.Context, new_prefix: str):
         """Change the bot's command prefix (Admin only)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
         if len(new_prefix) > 5:
             await ctx.send("Prefix must be 5 characters or less!")
             return
@@ -86,6 +144,11 @@ class AdminCommands(commands.Cog):
         self.bot.config.command_prefix = new_prefix
         self.bot.command_prefix = new_prefix
         
+        # Cached help embeds show the old prefix
+        chat_cog = self.bot.get_cog("ChatCommands")
+        if chat_cog:
+            chat_cog.clear_help_cache()
+        
         embed = discord.Embed(
             title="✅ Prefix Updated",
             description=f"Command prefix changed from `{old_prefix}` to `{new_prefix}`",
@@ -99,12 +162,11 @@ class AdminCommands(commands.Cog):
     @commands.command(name="botstats")
     async def admin_stats(self, ctx: commands.Context):
         """Show detailed bot statistics (Admin only)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
-        # Get chat statistics
-        chat_stats = self.bot.chat_manager.get_stats()
+        bot = self.bot
+        user = bot.user
+        cfg = bot.config
+        guilds = bot.guilds
+        n_guilds = len(guilds)
         
         # Bot information
         embed = discord.Embed(
@@ -115,37 +177,49 @@ class AdminCommands(commands.Cog):
         # Basic info
         embed.add_field(
             name="Bot Info",
-            value=f"**Name:** {self.bot.user.name}\n"
-                  f"**ID:** {self.bot.user.id}\n"
-                  f"**Guilds:** {len(self.bot.guilds)}\n"
-                  f"**Users:** {len(self.bot.users)}",
+            value="\n".join([
+                f"**Name:** {user.name}",
+                f"**ID:** {user.id}",
+                f"**Guilds:** {n_guilds}",
+                f"**Users:** {len(bot.users)}"
+            ]),
             inline=True
         )
         
         # Configuration
+        chat_channel_id = cfg.chat_channel_id
         embed.add_field(
             name="Configuration",
-            value=f"**Prefix:** `{self.bot.config.command_prefix}`\n"
-                  f"**Chat Channel:** {f'<#{self.bot.config.chat_channel_id}>' if self.bot.config.chat_channel_id else 'None'}\n"
-                  f"**Admin:** <@{self.bot.config.admin_user_id}>",
+            value="\n".join([
+                f"**Prefix:** `{cfg.command_prefix}`",
+                f"**Chat Channel:** {f'<#{chat_channel_id}>' if chat_channel_id else 'None'}",
+                f"**Admin:** <@{cfg.admin_user_id}>"
+            ]),
             inline=True
         )
         
-        # Chat statistics
+        # Chat statistics (only tracked for in-process history)
+        if bot.chat_store:
+            chat_stats = "Stored in Redis; not tracked"
+        else:
+            cs = bot.chat_manager.get_stats()
+            chat_stats = "\n".join([
+                f"**Active Channels:** {cs['total_channels']}",
+                f"**Active Users:** {cs['total_users']}",
+                f"**Channel Messages:** {cs['total_channel_messages']}",
+                f"**User Messages:** {cs['total_user_messages']}"
+            ])
         embed.add_field(
             name="Chat Statistics",
-            value=f"**Active Channels:** {chat_stats['total_channels']}\n"
-                  f"**Active Users:** {chat_stats['total_users']}\n"
-                  f"**Channel Messages:** {chat_stats['total_channel_messages']}\n"
-                  f"**User Messages:** {chat_stats['total_user_messages']}",
+            value=chat_stats,
             inline=False
         )
         
         # Server list
         server_list = "\n".join([f"• {guild.name} ({guild.member_count} members)" 
-                                for guild in sorted(self.bot.guilds, key=lambda g: g.member_count, reverse=True)[:5]])
-        if len(self.bot.guilds) > 5:
-            server_list += f"\n... and {len(self.bot.guilds) - 5} more"
+                                for guild in heapq.nlargest(5, guilds, key=lambda g: g.member_count)])
+        if n_guilds > 5:
+            server_list += f"\n... and {n_guilds - 5} more"
         
         embed.add_field(
             name="Top Servers",
@@ -158,36 +232,17 @@ class AdminCommands(commands.Cog):
     @commands.command(name="clearall")
     async def clear_all_history(self, ctx: commands.Context):
         """Clear all chat history (Admin only)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
         # Clear all histories
-        self.bot.chat_manager.channel_histories.clear()
-        self.bot.chat_manager.user_histories.clear()
+        await self.bot.clear_all_contexts()
         
-        embed = discord.Embed(
-            title="🗑️ All Chat History Cleared",
-            description="All conversation histories have been reset",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._clear_all_embed, allowed_mentions=discord.AllowedMentions.none())
         
         logger.info(f"Admin {ctx.author} cleared all chat history")
     
     @commands.command(name="shutdown")
     async def shutdown_bot(self, ctx: commands.Context):
         """Shutdown the bot (Admin only)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
-        embed = discord.Embed(
-            title="🛑 Bot Shutting Down",
-            description="Bot is shutting down gracefully...",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._shutdown_embed, allowed_mentions=discord.AllowedMentions.none())
         
         logger.info(f"Admin {ctx.author} initiated bot shutdown")
         await self.bot.close()
@@ -195,10 +250,6 @@ class AdminCommands(commands.Cog):
     @commands.command(name="eval")
     async def eval_code(self, ctx: commands.Context, *, code: str):
         """Execute Python code (Admin only - use with caution)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
         try:
             # Remove code blocks if present
             if code.startswith('```python'):
@@ -207,7 +258,7 @@ class AdminCommands(commands.Cog):
                 code = code[3:-3]
             
             # Execute the code
-            result = eval(code)
+            result = eval(_compile(code), globals(), {"self": self, "ctx": ctx, "bot": self.bot})
             
             embed = discord.Embed(
                 title="💻 Code Execution Result",
@@ -227,10 +278,6 @@ class AdminCommands(commands.Cog):
     @commands.command(name="say")
     async def say_message(self, ctx: commands.Context, channel: Optional[discord.TextChannel], *, message: str):
         """Make the bot say something in a channel (Admin only)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
         target_channel = channel or ctx.channel
         
         try:
@@ -245,10 +292,6 @@ class AdminCommands(commands.Cog):
     @commands.command(name="reload")
     async def reload_cog(self, ctx: commands.Context, cog_name: str = None):
         """Reload bot cogs (Admin only)"""
-        if not self.is_admin(ctx.author.id):
-            await ctx.send("Only the bot admin can use this command!")
-            return
-        
         if not cog_name:
             await ctx.send("Available cogs: ChatCommands, FunCommands, AdminCommands")
             return
@@ -267,19 +310,9 @@ class AdminCommands(commands.Cog):
             color=discord.Color.blue()
         )
         
-        # Generate invite link
-        permissions = discord.Permissions()
-        permissions.send_messages = True
-        permissions.read_messages = True
-        permissions.read_message_history = True
-        permissions.embed_links = True
-        permissions.add_reactions = True
-        
-        invite_url = discord.utils.oauth_url(self.bot.user.id, permissions=permissions)
-        
         embed.add_field(
             name="📎 Invite Bot",
-            value=f"[Click here to invite me!]({invite_url})",
+            value=f"[Click here to invite me!]({self.invite_url})",
             inline=False
         )
         
@@ -291,9 +324,11 @@ class AdminCommands(commands.Cog):
         
         embed.add_field(
             name="ℹ️ Bot Info",
-            value=f"**Powered by:** OpenRouter & DeepSeek\n"
-                  f"**Prefix:** `{self.bot.config.command_prefix}`\n"
-                  f"**Version:** 1.0.0",
+            value="\n".join([
+                "**Powered by:** OpenRouter & DeepSeek",
+                f"**Prefix:** `{self.bot.config.command_prefix}`",
+                "**Version:** 1.0.0"
+            ]),
             inline=False
         )
         
@@ -3,23 +3,32 @@ Chat history and context management
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from collections import defaultdict, deque
 
 logger = logging.getLogger(__name__)
 
+# Frees discarded histories off the event loop thread
+_release_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-release")
+
+def _release(*histories: Dict[int, deque]):
+    """Drop the last references to discarded history dicts"""
+    for history in histories:
+        history.clear()
+
 class ChatManager:
     """Manages chat history and context for conversations"""
     
     def __init__(self, max_history: int = 20):
         self.max_history = max_history
         # Store chat history per channel/user
-        self.channel_histories: Dict[int, deque] = defaultdict(
-            lambda: deque(maxlen=self.max_history)
-        )
-        self.user_histories: Dict[int, deque] = defaultdict(
-            lambda: deque(maxlen=self.max_history)
-        )
+        self.channel_histories: Dict[int, deque] = self._new_histories()
+        self.user_histories: Dict[int, deque] = self._new_histories()
+    
+    def _new_histories(self) -> Dict[int, deque]:
+        """Create an empty history store with bounded per-conversation deques"""
+        return defaultdict(lambda: deque(maxlen=self.max_history))
     
     def add_message(
         self, 
@@ -134,6 +143,19 @@ class ChatManager:
             self.user_histories[user_id].clear()
             logger.info(f"Cleared history for user {user_id}")
     
+    def clear_all(self):
+        """
+        Clear chat history for every channel and user
+        
+        Fresh dicts are swapped in immediately; the old ones are freed on a
+        worker thread so large histories don't stall the event loop.
+        """
+        old_channels, old_users = self.channel_histories, self.user_histories
+        self.channel_histories = self._new_histories()
+        self.user_histories = self._new_histories()
+        _release_executor.submit(_release, old_channels, old_users)
+        logger.info("Cleared all chat history")
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Get statistics about chat history
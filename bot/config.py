@@ -3,41 +3,128 @@ Configuration management for the Discord AI bot
 """
 
 import os
-from typing import Optional
+from typing import Dict, Optional
+
+_DEFAULT_SYSTEM_PROMPT = """You are a friendly and helpful AI assistant on Discord.
+        You should be conversational, engaging, and provide useful responses.
+        Keep your messages concise but informative. Use Discord markdown when appropriate
+        (like **bold** for emphasis, `code` for code snippets, etc.).
+        Be respectful and maintain a positive tone in all interactions."""
+
+# Marks lazily loaded settings that have not been read yet
+_UNSET = object()
+
+def _env_bool(value: str) -> bool:
+    """Parse a true/false environment flag"""
+    return value.lower() == "true"
+
+# (attribute, environment variable, converter, default)
+_ENV_SPEC = (
+    # Discord settings
+    ("discord_token", "DISCORD_TOKEN", str, ""),
+    ("command_prefix", "COMMAND_PREFIX", str, "!"),
+
+    # Admin settings
+    ("admin_user_id", "ADMIN_USER_ID", int, "782306059469193257"),
+    ("help_server_invite", "HELP_SERVER_INVITE", str, "https://discord.gg/k7Sss4yKj5"),
+
+    # OpenRouter settings
+    ("openrouter_api_key", "OPENROUTER_API_KEY", str, ""),
+
+    # Bot personality and behavior
+    ("max_history_messages", "MAX_HISTORY_MESSAGES", int, "20"),
+    ("max_response_length", "MAX_RESPONSE_LENGTH", int, "2000"),
+
+    # Fun features
+    ("enable_auto_reactions", "ENABLE_AUTO_REACTIONS", _env_bool, "true"),
+    ("daily_greeting", "DAILY_GREETING", _env_bool, "false"),
+
+    # Rate limiting settings
+    ("rate_limit_requests", "RATE_LIMIT_REQUESTS", int, "10"),
+    ("rate_limit_window", "RATE_LIMIT_WINDOW", int, "60"),
+    ("retry_delay_base", "RETRY_DELAY_BASE", float, "1.0"),
+    ("max_retries", "MAX_RETRIES", int, "3"),
+    ("max_concurrent_requests", "MAX_CONCURRENT_REQUESTS", int, "8"),
+
+    # Redis chat history settings (in-process history when unset)
+    ("redis_url", "REDIS_URL", str, ""),
+    ("chat_history_ttl", "CHAT_HISTORY_TTL", int, "86400"),
+
+    # Response cache settings
+    ("response_cache_size", "RESPONSE_CACHE_SIZE", int, "256"),
+    ("response_cache_ttl", "RESPONSE_CACHE_TTL", int, "600"),
+)
 
 class BotConfig:
     """Configuration class for bot settings"""
-    
+
+    __slots__ = tuple(attr for attr, _, _, _ in _ENV_SPEC) + (
+        "_chat_channel_id",
+        "openrouter_base_url",
+        "model_name",
+        "_system_prompt",
+        "_system_message",
+    )
+
+    discord_token: str
+    command_prefix: str
+    admin_user_id: int
+    help_server_invite: str
+    openrouter_api_key: str
+    openrouter_base_url: str
+    model_name: str
+    max_history_messages: int
+    max_response_length: int
+    enable_auto_reactions: bool
+    daily_greeting: bool
+    rate_limit_requests: int
+    rate_limit_window: int
+    retry_delay_base: float
+    max_retries: int
+    max_concurrent_requests: int
+    redis_url: str
+    chat_history_ttl: int
+    response_cache_size: int
+    response_cache_ttl: int
+
     def __init__(self):
-        # Discord settings
-        self.discord_token: str = os.getenv("DISCORD_TOKEN", "")
-        self.command_prefix: str = os.getenv("COMMAND_PREFIX", "!")
-        self.chat_channel_id: Optional[int] = self._get_channel_id()
-        
-        # Admin settings
-        self.admin_user_id: int = int(os.getenv("ADMIN_USER_ID", "782306059469193257"))
-        self.help_server_invite: str = os.getenv("HELP_SERVER_INVITE", "https://discord.gg/k7Sss4yKj5")
-        
-        # OpenRouter settings
-        self.openrouter_api_key: str = os.getenv("OPENROUTER_API_KEY", "")
-        self.openrouter_base_url: str = "https://openrouter.ai/api/v1"
-        self.model_name: str = "deepseek/deepseek-r1-0528-qwen3-8b:free"
-        
-        # Bot personality and behavior
-        self.system_prompt: str = self._get_system_prompt()
-        self.max_history_messages: int = int(os.getenv("MAX_HISTORY_MESSAGES", "20"))
-        self.max_response_length: int = int(os.getenv("MAX_RESPONSE_LENGTH", "2000"))
-        
-        # Fun features
-        self.enable_auto_reactions: bool = os.getenv("ENABLE_AUTO_REACTIONS", "true").lower() == "true"
-        self.daily_greeting: bool = os.getenv("DAILY_GREETING", "false").lower() == "true"
-        
-        # Rate limiting settings
-        self.rate_limit_requests: int = int(os.getenv("RATE_LIMIT_REQUESTS", "10"))
-        self.rate_limit_window: int = int(os.getenv("RATE_LIMIT_WINDOW", "60"))
-        self.retry_delay_base: float = float(os.getenv("RETRY_DELAY_BASE", "1.0"))
-        self.max_retries: int = int(os.getenv("MAX_RETRIES", "3"))
-        
+        env = os.environ
+        for attr, key, conv, default in _ENV_SPEC:
+            setattr(self, attr, conv(env.get(key, default)))
+
+        self.openrouter_base_url = "https://openrouter.ai/api/v1"
+        self.model_name = "deepseek/deepseek-r1-0528-qwen3-8b:free"
+
+        # Resolved on first access
+        self._chat_channel_id = _UNSET
+        self._system_prompt = _UNSET
+        self._system_message = _UNSET
+
+    @property
+    def chat_channel_id(self) -> Optional[int]:
+        """Chat channel the bot responds in, if any"""
+        if self._chat_channel_id is _UNSET:
+            self._chat_channel_id = self._get_channel_id()
+        return self._chat_channel_id
+
+    @chat_channel_id.setter
+    def chat_channel_id(self, value: Optional[int]):
+        self._chat_channel_id = value
+
+    @property
+    def system_prompt(self) -> str:
+        """System prompt for the AI"""
+        if self._system_prompt is _UNSET:
+            self._system_prompt = self._get_system_prompt()
+        return self._system_prompt
+
+    @property
+    def system_message(self) -> Dict[str, str]:
+        """System prompt as an API message, shared by every request"""
+        if self._system_message is _UNSET:
+            self._system_message = {"role": "system", "content": self.system_prompt}
+        return self._system_message
+
     def _get_channel_id(self) -> Optional[int]:
         """Get chat channel ID from environment"""
         channel_id = os.getenv("CHAT_CHANNEL_ID")
@@ -47,27 +134,21 @@ class BotConfig:
             except ValueError:
                 return None
         return None
-    
+
     def _get_system_prompt(self) -> str:
         """Get system prompt for the AI"""
-        default_prompt = """You are a friendly and helpful AI assistant on Discord. 
-        You should be conversational, engaging, and provide useful responses. 
-        Keep your messages concise but informative. Use Discord markdown when appropriate 
-        (like **bold** for emphasis, `code` for code snippets, etc.). 
-        Be respectful and maintain a positive tone in all interactions."""
-        
-        return os.getenv("SYSTEM_PROMPT", default_prompt)
-    
+        return os.getenv("SYSTEM_PROMPT") or _DEFAULT_SYSTEM_PROMPT
+
     def validate(self) -> bool:
         """Validate that required configuration is present"""
         required_vars = [
             ("DISCORD_TOKEN", self.discord_token),
             ("OPENROUTER_API_KEY", self.openrouter_api_key)
         ]
-        
+
         for var_name, var_value in required_vars:
             if not var_value:
                 print(f"Error: {var_name} environment variable is required")
                 return False
-        
+
         return True
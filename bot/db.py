@@ -1,19 +1,207 @@
+import asyncio
+import atexit
+import logging
 import os
-from pymongo import MongoClient
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure, PyMongoError
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 MONGODB_URI = os.getenv("MONGODB_URI")
 
 if not MONGODB_URI:
     raise ValueError("MONGODB_URI environment variable is required")
 
-client = MongoClient(MONGODB_URI)
+# Small pool is plenty for config reads/writes; w=1 skips waiting on majority ack
+client = AsyncIOMotorClient(
+    MONGODB_URI,
+    maxPoolSize=20,
+    minPoolSize=2,
+    maxIdleTimeMS=60000,
+    retryWrites=True,
+    w=1
+)
 db = client.get_default_database()
 
+# Seconds a cached guild -> channel mapping stays valid
+CHANNEL_CACHE_TTL = 300
+
+_collection_cache: Dict[str, AsyncIOMotorCollection] = {}
+channel_cache: Dict[int, Optional[int]] = {}
+channel_cache_ts: Dict[int, float] = {}
+
+# Seconds between flushes of queued channel writes
+CHANNEL_WRITE_INTERVAL = 0.1
+
+# Upper bound in seconds on the flush interval while writes keep failing
+CHANNEL_WRITE_MAX_INTERVAL = 60.0
+
+# Backoff bounds in seconds for restarting the channel change stream
+WATCH_RETRY_DELAY = 1.0
+WATCH_MAX_RETRY_DELAY = 60.0
+
+# Server error codes: change streams need a replica set; resume point aged out of the oplog
+_CHANGE_STREAM_UNSUPPORTED = 40573
+_CHANGE_STREAM_HISTORY_LOST = 286
+
+_channel_writes: Optional["asyncio.Queue[Tuple[int, Optional[int]]]"] = None
+_indexes_created = False
+
 def get_collection(name):
-    return db[name]
+    collection = _collection_cache.get(name)
+    if collection is None:
+        collection = _collection_cache[name] = db[name]
+    return collection
+
+async def ensure_indexes():
+    """Create the indexes the bot's queries rely on (once per process)"""
+    global _indexes_created
+    if _indexes_created:
+        return
+    await get_collection("channels").create_index("guild_id", unique=True)
+    _indexes_created = True
+
+def cache_channel_id(guild_id: int, channel_id: Optional[int]):
+    """Store (or overwrite) the cached chat channel for a guild"""
+    channel_cache[guild_id] = channel_id
+    channel_cache_ts[guild_id] = time.monotonic()
+
+async def get_channel_id(guild_id: int) -> Optional[int]:
+    """Get the chat channel for a guild, hitting MongoDB only on a cache miss"""
+    ts = channel_cache_ts.get(guild_id)
+    if ts is not None and time.monotonic() - ts < CHANNEL_CACHE_TTL:
+        return channel_cache[guild_id]
+
+    doc = await get_collection("channels").find_one({"guild_id": guild_id})
+    channel_id = doc["channel_id"] if doc else None
+    cache_channel_id(guild_id, channel_id)
+    return channel_id
+
+async def get_channel_ids(guild_ids: List[int]) -> Dict[int, Optional[int]]:
+    """Get chat channels for many guilds, fetching all cache misses in one query"""
+    now = time.monotonic()
+    result: Dict[int, Optional[int]] = {}
+    missing = []
+    for guild_id in guild_ids:
+        ts = channel_cache_ts.get(guild_id)
+        if ts is not None and now - ts < CHANNEL_CACHE_TTL:
+            result[guild_id] = channel_cache[guild_id]
+        else:
+            missing.append(guild_id)
+
+    if missing:
+        found = {}
+        cursor = get_collection("channels").find(
+            {"guild_id": {"$in": missing}},
+            {"guild_id": 1, "channel_id": 1}
+        )
+        async for doc in cursor:
+            found[doc["guild_id"]] = doc["channel_id"]
+        for guild_id in missing:
+            result[guild_id] = found.get(guild_id)
+            cache_channel_id(guild_id, result[guild_id])
+
+    return result
+
+def _get_write_queue() -> "asyncio.Queue[Tuple[int, Optional[int]]]":
+    global _channel_writes
+    if _channel_writes is None:
+        _channel_writes = asyncio.Queue()
+    return _channel_writes
+
+def queue_channel_update(guild_id: int, channel_id: Optional[int]):
+    """Cache a guild's chat channel (None to unset it) and queue it to be persisted in the next batch"""
+    cache_channel_id(guild_id, channel_id)
+    _get_write_queue().put_nowait((guild_id, channel_id))
+
+async def flush_channel_writes():
+    """Persist all queued channel writes with a single unordered bulk_write"""
+    queue = _get_write_queue()
+    pending: Dict[int, Optional[int]] = {}
+    while not queue.empty():
+        guild_id, channel_id = queue.get_nowait()
+        # Later writes for the same guild win, so unordered execution is safe
+        pending[guild_id] = channel_id
+
+    if not pending:
+        return
+
+    ops = [
+        UpdateOne(
+            {"guild_id": guild_id},
+            {"$set": {"guild_id": guild_id, "channel_id": channel_id}},
+            upsert=True
+        )
+        for guild_id, channel_id in pending.items()
+    ]
+    try:
+        await get_collection("channels").bulk_write(ops, ordered=False)
+    except BaseException:
+        # Requeue so a failed or cancelled batch is retried by the next flush,
+        # skipping guilds that have been given a newer channel since
+        for guild_id, channel_id in pending.items():
+            if channel_cache.get(guild_id) == channel_id:
+                queue.put_nowait((guild_id, channel_id))
+        raise
+
+async def run_channel_writer():
+    """Background task draining the channel write queue, backing off while flushes fail"""
+    interval = CHANNEL_WRITE_INTERVAL
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_channel_writes()
+        except Exception as e:
+            interval = min(interval * 2, CHANNEL_WRITE_MAX_INTERVAL)
+            logger.error(f"Error flushing channel writes, retrying in {interval:.1f}s: {e}")
+        else:
+            interval = CHANNEL_WRITE_INTERVAL
+
+async def watch_channel_changes(on_change: Callable[[int, Optional[int]], None]):
+    """
+    Apply channel writes from other bot instances as they happen
+
+    The stream is resumed after transient errors, backing off between
+    attempts; it only stops when the server doesn't support change streams.
+
+    Args:
+        on_change: Called with (guild_id, channel_id) for every change
+    """
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+    resume_token = None
+    delay = WATCH_RETRY_DELAY
+    while True:
+        try:
+            async with get_collection("channels").watch(
+                pipeline, full_document="updateLookup", resume_after=resume_token
+            ) as stream:
+                delay = WATCH_RETRY_DELAY
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    doc = change.get("fullDocument")
+                    if doc:
+                        cache_channel_id(doc["guild_id"], doc["channel_id"])
+                        on_change(doc["guild_id"], doc["channel_id"])
+        except OperationFailure as e:
+            if e.code == _CHANGE_STREAM_UNSUPPORTED:
+                logger.warning(f"Channel change stream unavailable, relying on cache TTL: {e}")
+                return
+            if e.code == _CHANGE_STREAM_HISTORY_LOST:
+                resume_token = None
+            logger.warning(f"Channel change stream failed, restarting in {delay:.0f}s: {e}")
+        except Exception as e:
+            logger.error(f"Channel change stream error, restarting in {delay:.0f}s: {e}")
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, WATCH_MAX_RETRY_DELAY)
 
 def close_connection():
     client.close()
+
+atexit.register(close_connection)
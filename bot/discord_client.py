@@ -5,16 +5,53 @@ Discord bot client with AI chat integration
 import logging
 import asyncio
 import random
-from typing import Optional
+from typing import Dict, Optional, Tuple
+import aiohttp
 import discord
 from discord.ext import commands
 
 from bot.config import BotConfig
-from bot.openrouter_client import OpenRouterClient
+from bot.openrouter_client import OpenRouterClient, create_http_session
 from bot.chat_manager import ChatManager
 
 logger = logging.getLogger(__name__)
 
+# Emoji picked from for auto-reactions
+_REACTIONS = ("👍", "😊", "🤔", "💡", "❤️", "🎉")
+
+# Discord's per-message character limit
+MAX_MESSAGE_LENGTH = 2000
+
+def _split(text: str, size: int = MAX_MESSAGE_LENGTH):
+    """Yield chunks of at most size characters, breaking at newlines where possible"""
+    start = 0
+    n = len(text)
+    while start < n:
+        end = min(start + size, n)
+        next_start = end
+        if end < n:
+            nl = text.rfind("\n", start, end)
+            if nl > start:
+                # Break at the newline and drop it, so the next chunk doesn't start with one
+                end = nl
+                next_start = nl + 1
+        yield text[start:end]
+        start = next_start
+
+async def send_chunked(destination, text: str):
+    """Send text, splitting long text into numbered chunks sent concurrently"""
+    if len(text) <= MAX_MESSAGE_LENGTH:
+        await destination.send(text)
+        return
+    
+    # Leave room for the "(i/n) " ordering prefix
+    chunks = list(_split(text, MAX_MESSAGE_LENGTH - 12))
+    total = len(chunks)
+    await asyncio.gather(*(
+        destination.send(f"({i}/{total}) {chunk}")
+        for i, chunk in enumerate(chunks, 1)
+    ))
+
 class DiscordBot(commands.Bot):
     """Discord bot with AI chat capabilities"""
     
@@ -34,25 +71,46 @@ class DiscordBot(commands.Bot):
         
         self.config = config
         self.chat_manager = ChatManager(config.max_history_messages)
+        # Redis history store, used instead of chat_manager when REDIS_URL is set
+        self.chat_store = None
         self.openrouter_client: Optional[OpenRouterClient] = None
+        # Shared HTTP session for outbound API calls (discord.py's own client is self.http)
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        self.channel_writer: Optional[asyncio.Task] = None
+        self.channel_watcher: Optional[asyncio.Task] = None
+        # Bot user ID, cached in on_ready for the per-message hot path
+        self._user_id: Optional[int] = None
+        self._rand = random.Random()
+        # Set once persisted chat channels have been loaded (guilds are only known after connecting)
+        self._channels_loaded = False
+        self.channel_loader: Optional[asyncio.Task] = None
     
     async def setup_hook(self):
         """Setup hook called when bot is starting"""
         logger.info("Setting up Discord bot...")
         
-        # Load chat channel from MongoDB if available
-        from bot.db import get_collection
-        channels = get_collection("channels")
-        if self.guilds:
-            for guild in self.guilds:
-                doc = channels.find_one({"guild_id": guild.id})
-                if doc:
-                    self.config.chat_channel_id = doc["channel_id"]
-                    logger.info(f"Loaded chat channel {doc['channel_id']} for guild {guild.id}")
+        # Indexes are created with the channel load in on_ready, off the login path
+        from bot.db import run_channel_writer, watch_channel_changes
+        
+        # Batch channel config writes in the background
+        self.channel_writer = asyncio.create_task(run_channel_writer())
+        
+        # Keep the channel cache in sync with other bot instances
+        self.channel_watcher = asyncio.create_task(watch_channel_changes(self._on_channel_change))
+        
+        # Use Redis for chat history if configured
+        if self.config.redis_url:
+            from bot.redis_store import RedisChatStore
+            self.chat_store = RedisChatStore(
+                self.config.redis_url,
+                self.config.max_history_messages,
+                self.config.chat_history_ttl
+            )
+            logger.info("Using Redis for chat history")
         
         # Initialize OpenRouter client
-        self.openrouter_client = OpenRouterClient(self.config)
-        await self.openrouter_client.create_session()
+        self.http_session = create_http_session()
+        self.openrouter_client = OpenRouterClient(self.config, session=self.http_session)
         
         # Add commands
         await self.add_cog(ChatCommands(self))
@@ -67,15 +125,110 @@ class DiscordBot(commands.Bot):
     
     async def close(self):
         """Clean shutdown"""
-        if self.openrouter_client:
-            await self.openrouter_client.close_session()
+        if self.channel_loader:
+            self.channel_loader.cancel()
+        if self.channel_watcher:
+            self.channel_watcher.cancel()
+        if self.channel_writer:
+            from bot.db import flush_channel_writes
+            self.channel_writer.cancel()
+            try:
+                await self.channel_writer
+            except asyncio.CancelledError:
+                pass
+            try:
+                await flush_channel_writes()
+            except Exception as e:
+                logger.error(f"Error flushing channel writes on shutdown: {e}")
+        if self.http_session:
+            await self.http_session.close()
+        if self.chat_store:
+            await self.chat_store.close()
         await super().close()
     
+    def _on_channel_change(self, guild_id: int, channel_id: Optional[int]):
+        """Route to a chat channel set for one of our guilds by another bot instance"""
+        if self.get_guild(guild_id) is not None and channel_id != self.config.chat_channel_id:
+            self.config.chat_channel_id = channel_id
+            logger.info(f"Chat channel for guild {guild_id} changed to {channel_id}")
+    
+    async def _load_chat_channels(self):
+        """Load persisted chat channels for every guild with a single MongoDB query"""
+        from bot.db import ensure_indexes, get_channel_ids
+        try:
+            # Not fatal, and the load doesn't depend on it; retried on the next on_ready
+            await ensure_indexes()
+        except Exception as e:
+            logger.error(f"Error creating MongoDB indexes: {e}")
+        
+        try:
+            channel_ids = await get_channel_ids([guild.id for guild in self.guilds])
+        except Exception as e:
+            logger.error(f"Error loading chat channels from MongoDB: {e}")
+            return
+        
+        self._channels_loaded = True
+        for guild in self.guilds:
+            channel_id = channel_ids.get(guild.id)
+            if channel_id:
+                self.config.chat_channel_id = channel_id
+                logger.info(f"Loaded chat channel {channel_id} for guild {guild.id}")
+    
+    async def record_message(self, channel, author_id: int, content: str, is_dm: bool, role: str = "user"):
+        """Add a message to the history of the conversation with author_id in channel"""
+        if self.chat_store:
+            conv_id = author_id if is_dm else channel.id
+            await self.chat_store.add(conv_id, role, content)
+            return
+        
+        self.chat_manager.add_message(
+            channel_id=channel.id,
+            user_id=author_id if role == "user" else self.user.id,
+            content=content,
+            role=role
+        )
+    
+    async def get_context(self, channel, author_id: int, is_dm: bool):
+        """Get API-formatted history of the conversation with author_id in channel"""
+        if is_dm:
+            if self.chat_store:
+                return await self.chat_store.get(author_id)
+            return self.chat_manager.get_conversation_context(user_id=author_id)
+        
+        if self.chat_store:
+            return await self.chat_store.get(channel.id)
+        return self.chat_manager.get_conversation_context(channel_id=channel.id)
+    
+    async def clear_context(self, channel, author_id: int, is_dm: bool):
+        """Clear the history of the conversation with author_id in channel"""
+        if is_dm:
+            if self.chat_store:
+                await self.chat_store.clear(author_id)
+            else:
+                self.chat_manager.clear_history(user_id=author_id)
+        elif self.chat_store:
+            await self.chat_store.clear(channel.id)
+        else:
+            self.chat_manager.clear_history(channel_id=channel.id)
+    
+    async def clear_all_contexts(self):
+        """Clear the history of every conversation"""
+        if self.chat_store:
+            await self.chat_store.clear_all()
+        else:
+            self.chat_manager.clear_all()
+    
     async def on_ready(self):
         """Called when bot is ready"""
+        self._user_id = self.user.id
         logger.info(f"Bot logged in as {self.user} (ID: {self.user.id})")
         logger.info(f"Bot is in {len(self.guilds)} guilds")
         
+        # on_ready fires again after reconnects; channels only need loading once.
+        # Runs in the background so a slow or unreachable MongoDB doesn't hold up the presence update
+        if not self._channels_loaded and (self.channel_loader is None or self.channel_loader.done()):
+            self.channel_loader = asyncio.create_task(self._load_chat_channels())
+        
         # Set bot status
         activity = discord.Activity(
             type=discord.ActivityType.listening,
@@ -95,78 +248,69 @@ class DiscordBot(commands.Bot):
         if message.author.bot:
             return
         
-        # Process commands first
-        await self.process_commands(message)
-        
-        # Skip if it was a command
+        # Commands are handled by discord.py and never get an AI reply
         if message.content.startswith(self.config.command_prefix):
+            await self.process_commands(message)
             return
         
         # Check if we should respond to this message
-        should_respond = await self._should_respond_to_message(message)
+        should_respond = self._should_respond_to_message(message)
         
         if should_respond:
             await self._handle_chat_message(message)
     
-    async def _should_respond_to_message(self, message: discord.Message) -> bool:
+    def _should_respond_to_message(self, message: discord.Message) -> bool:
         """Determine if bot should respond to a message"""
         # Always respond to DMs
-        if isinstance(message.channel, discord.DMChannel):
+        if message.channel.type is discord.ChannelType.private:
             return True
         
         # If specific channel is configured, only respond there
-        if self.config.chat_channel_id:
-            return message.channel.id == self.config.chat_channel_id
+        chan_id = self.config.chat_channel_id
+        if chan_id:
+            return message.channel.id == chan_id
         
         # Otherwise, respond to mentions
-        return self.user in message.mentions
+        # mentions includes reply-pings, which leave no <@id> in the content
+        user_id = self._user_id
+        return any(user.id == user_id for user in message.mentions)
+    
+    def _can_react(self, message: discord.Message) -> bool:
+        """Check locally whether the bot may add reactions to a message"""
+        # DMs have no permission overwrites; always attempt
+        if message.guild is None:
+            return True
+        return message.channel.permissions_for(message.guild.me).add_reactions
     
     async def _handle_chat_message(self, message: discord.Message):
         """Handle chat message and generate AI response"""
+        is_dm = message.channel.type is discord.ChannelType.private
         try:
-            # Show typing indicator
-            async with message.channel.typing():
-                # Add auto-reactions if enabled
-                if self.config.enable_auto_reactions and random.random() < 0.1:  # 10% chance
-                    reactions = ["👍", "😊", "🤔", "💡", "❤️", "🎉"]
+            # Add auto-reactions if enabled
+            if self.config.enable_auto_reactions:
+                if self._rand.random() < 0.1 and self._can_react(message):  # 10% chance
                     try:
-                        await message.add_reaction(random.choice(reactions))
-                    except:
+                        await message.add_reaction(_REACTIONS[self._rand.randrange(len(_REACTIONS))])
+                    except discord.HTTPException:
                         pass  # Ignore reaction errors
-                
+            
+            # Show typing indicator
+            async with message.channel.typing():
                 # Add user message to history
-                self.chat_manager.add_message(
-                    channel_id=message.channel.id,
-                    user_id=message.author.id,
-                    content=message.content,
-                    role="user"
-                )
+                await self.record_message(message.channel, message.author.id, message.content, is_dm)
                 
                 # Get conversation context
-                if isinstance(message.channel, discord.DMChannel):
-                    context = self.chat_manager.get_conversation_context(user_id=message.author.id)
-                else:
-                    context = self.chat_manager.get_conversation_context(channel_id=message.channel.id)
+                context = await self.get_context(message.channel, message.author.id, is_dm)
                 
                 # Generate AI response
                 response = await self.openrouter_client.generate_response(context)
                 
                 if response:
                     # Split long responses if needed
-                    if len(response) > 2000:
-                        chunks = [response[i:i+2000] for i in range(0, len(response), 2000)]
-                        for chunk in chunks:
-                            await message.channel.send(chunk)
-                    else:
-                        await message.channel.send(response)
+                    await send_chunked(message.channel, response)
                     
                     # Add bot response to history
-                    self.chat_manager.add_message(
-                        channel_id=message.channel.id,
-                        user_id=self.user.id,
-                        content=response,
-                        role="assistant"
-                    )
+                    await self.record_message(message.channel, message.author.id, response, is_dm, role="assistant")
                     
                     logger.info(f"Responded to message from {message.author} in {message.channel}")
                 else:
@@ -181,6 +325,11 @@ class DiscordBot(commands.Bot):
         if isinstance(error, commands.CommandNotFound):
             return  # Ignore unknown commands
         
+        if isinstance(error, commands.CheckFailure):
+            if not getattr(error, "silent", False):
+                await ctx.send(str(error), allowed_mentions=discord.AllowedMentions.none())
+            return
+        
         logger.error(f"Command error in {ctx.command}: {error}")
         await ctx.send(f"An error occurred: {str(error)}")
 
@@ -189,6 +338,8 @@ class ChatCommands(commands.Cog):
     
     def __init__(self, bot: DiscordBot):
         self.bot = bot
+        # Prebuilt help embeds keyed by (category, is_admin, prefix)
+        self._help_cache: Dict[Tuple[str, bool, str], discord.Embed] = {}
     
     @commands.command(name="ask")
     async def ask_command(self, ctx: commands.Context, *, question: str):
@@ -204,12 +355,7 @@ class ChatCommands(commands.Cog):
                 response = await self.bot.openrouter_client.generate_response(messages)
                 
                 if response:
-                    if len(response) > 2000:
-                        chunks = [response[i:i+2000] for i in range(0, len(response), 2000)]
-                        for chunk in chunks:
-                            await ctx.send(chunk)
-                    else:
-                        await ctx.send(response)
+                    await send_chunked(ctx, response)
                 else:
                     await ctx.send("Sorry, I couldn't generate a response to your question.")
             
@@ -220,39 +366,22 @@ class ChatCommands(commands.Cog):
     @commands.command(name="chat")
     async def chat_command(self, ctx: commands.Context, *, message: str):
         """Chat with the AI (includes conversation history)"""
+        is_dm = ctx.channel.type is discord.ChannelType.private
         async with ctx.typing():
             try:
                 # Add user message to history
-                self.bot.chat_manager.add_message(
-                    channel_id=ctx.channel.id,
-                    user_id=ctx.author.id,
-                    content=message,
-                    role="user"
-                )
+                await self.bot.record_message(ctx.channel, ctx.author.id, message, is_dm)
                 
                 # Get conversation context
-                if isinstance(ctx.channel, discord.DMChannel):
-                    context = self.bot.chat_manager.get_conversation_context(user_id=ctx.author.id)
-                else:
-                    context = self.bot.chat_manager.get_conversation_context(channel_id=ctx.channel.id)
+                context = await self.bot.get_context(ctx.channel, ctx.author.id, is_dm)
                 
                 response = await self.bot.openrouter_client.generate_response(context)
                 
                 if response:
-                    if len(response) > 2000:
-                        chunks = [response[i:i+2000] for i in range(0, len(response), 2000)]
-                        for chunk in chunks:
-                            await ctx.send(chunk)
-                    else:
-                        await ctx.send(response)
+                    await send_chunked(ctx, response)
                     
                     # Add bot response to history
-                    self.bot.chat_manager.add_message(
-                        channel_id=ctx.channel.id,
-                        user_id=self.bot.user.id,
-                        content=response,
-                        role="assistant"
-                    )
+                    await self.bot.record_message(ctx.channel, ctx.author.id, response, is_dm, role="assistant")
                 else:
                     await ctx.send("Sorry, I couldn't generate a response.")
             
@@ -264,10 +393,8 @@ class ChatCommands(commands.Cog):
     async def clear_history(self, ctx: commands.Context):
         """Clear chat history for this channel/user"""
         try:
-            if isinstance(ctx.channel, discord.DMChannel):
-                self.bot.chat_manager.clear_history(user_id=ctx.author.id)
-            else:
-                self.bot.chat_manager.clear_history(channel_id=ctx.channel.id)
+            is_dm = ctx.channel.type is discord.ChannelType.private
+            await self.bot.clear_context(ctx.channel, ctx.author.id, is_dm)
             
             await ctx.send("✅ Chat history cleared!")
         except Exception as e:
@@ -278,6 +405,17 @@ class ChatCommands(commands.Cog):
     async def chat_stats(self, ctx: commands.Context):
         """Show chat statistics"""
         try:
+            if self.bot.chat_store:
+                # Redis history isn't counted in-process
+                embed = discord.Embed(
+                    title="📊 Chat Statistics",
+                    description="Chat history is stored in Redis; conversation counts aren't tracked.",
+                    color=discord.Color.blue()
+                )
+                embed.add_field(name="Max History", value=self.bot.config.max_history_messages, inline=True)
+                await ctx.send(embed=embed)
+                return
+            
             stats = self.bot.chat_manager.get_stats()
             
             embed = discord.Embed(
@@ -298,6 +436,22 @@ class ChatCommands(commands.Cog):
     @commands.command(name="help")
     async def help_command(self, ctx: commands.Context, category: str = None):
         """Show help information"""
+        is_admin = ctx.author.id == self.bot.config.admin_user_id
+        if category not in ("fun", "admin") or (category == "admin" and not is_admin):
+            category = "main"
+        
+        key = (category, is_admin, self.bot.config.command_prefix)
+        embed = self._help_cache.get(key)
+        if embed is None:
+            embed = self._help_cache[key] = self._build_help_embed(category, is_admin)
+        await ctx.send(embed=embed)
+    
+    def clear_help_cache(self):
+        """Drop prebuilt help embeds, e.g. after the prefix changes"""
+        self._help_cache.clear()
+    
+    def _build_help_embed(self, category: str, is_admin: bool) -> discord.Embed:
+        """Build the help embed for a category"""
         if category == "fun":
             embed = discord.Embed(
                 title="🎮 Fun Commands",
@@ -311,7 +465,7 @@ class ChatCommands(commands.Cog):
             embed.add_field(name=f"{self.bot.config.command_prefix}guess [max]", value="Number guessing game", inline=True)
             embed.add_field(name=f"{self.bot.config.command_prefix}game <type>", value="Start mini-games (trivia, math, word, riddle)", inline=False)
             
-        elif category == "admin" and ctx.author.id == self.bot.config.admin_user_id:
+        elif category == "admin":
             embed = discord.Embed(
                 title="⚙️ Admin Commands",
                 description="Bot management commands (Admin only)",
@@ -358,7 +512,7 @@ class ChatCommands(commands.Cog):
                 inline=False
             )
             
-            if ctx.author.id == self.bot.config.admin_user_id:
+            if is_admin:
                 embed.add_field(
                     name="⚙️ Admin",
                     value=f"`{self.bot.config.command_prefix}help admin` - Admin commands",
@@ -366,4 +520,4 @@ class ChatCommands(commands.Cog):
                 )
         
         embed.set_footer(text=f"Powered by OpenRouter & DeepSeek | Support: {self.bot.config.help_server_invite}")
-        await ctx.send(embed=embed)
+        return embed
@@ -3,38 +3,111 @@ Fun and entertainment commands for the Discord bot
 """
 
 import asyncio
+import operator
 import random
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import discord
 from discord.ext import commands
 
 logger = logging.getLogger(__name__)
 
+JOKES: Tuple[str, ...] = (
+    "Why don't scientists trust atoms? Because they make up everything!",
+    "Why did the scarecrow win an award? He was outstanding in his field!",
+    "Why don't eggs tell jokes? They'd crack each other up!",
+    "What do you call a fake noodle? An impasta!",
+    "Why did the math book look so sad? Because it had too many problems!",
+    "What do you call a bear with no teeth? A gummy bear!",
+    "Why don't skeletons fight each other? They don't have the guts!",
+    "What do you call a sleeping bull? A bulldozer!",
+    "Why did the coffee file a police report? It got mugged!",
+    "What's the best thing about Switzerland? I don't know, but the flag is a big plus!"
+)
+
+ACTIVITIES: Tuple[str, ...] = (
+    "🎲 Roll a dice: You got a **{}**!",
+    "🪙 Flip a coin: It's **{}**!",
+    "🌟 Your luck today: **{}**/10",
+    "🎯 Random fact: Did you know that honey never spoils?",
+    "🎯 Random fact: A group of flamingos is called a 'flamboyance'!",
+    "🎯 Random fact: Octopuses have three hearts!",
+    "🔮 Magic 8-Ball says: **{}**"
+)
+
+MAGIC8: Tuple[str, ...] = ("Yes", "No", "Maybe", "Ask again later", "Definitely", "Not likely", "Absolutely")
+
+COIN_SIDES: Tuple[str, ...] = ("Heads", "Tails")
+
+# (question, answer) pairs; answers are stored casefolded and stripped
+TRIVIA: Tuple[Tuple[str, str], ...] = (
+    ("What is the capital of France?", "paris"),
+    ("What is 2 + 2?", "4"),
+    ("What planet is known as the Red Planet?", "mars"),
+    ("Who painted the Mona Lisa?", "leonardo da vinci"),
+    ("What is the largest ocean on Earth?", "pacific")
+)
+
+WORDS: Tuple[str, ...] = ("cat", "sun", "book", "music", "ocean", "mountain", "flower", "computer", "friendship", "adventure")
+
+# (symbol, function) pairs for the math game
+_OPS = (("+", operator.add), ("-", operator.sub), ("*", operator.mul))
+
+# (riddle, answer) pairs; answers are stored casefolded and stripped
+RIDDLES: Tuple[Tuple[str, str], ...] = (
+    ("I speak without a mouth and hear without ears. I have no body, but come alive with wind. What am I?", "echo"),
+    ("The more you take, the more you leave behind. What am I?", "footsteps"),
+    ("I'm tall when I'm young, and short when I'm old. What am I?", "candle"),
+    ("What has keys but no locks, space but no room, and you can enter but not go inside?", "keyboard"),
+    ("What gets wetter as it dries?", "towel")
+)
+
 class FunCommands(commands.Cog):
     """Fun and entertainment commands"""
     
+    # Dedicated generator instead of the module-level random functions
+    _rand = random.Random()
+    
     def __init__(self, bot):
         self.bot = bot
-        self.active_games: Dict[int, Dict[str, Any]] = {}
+        # Pending replies for running games, keyed by (channel_id, user_id)
+        self.active_games: Dict[Tuple[int, int], List[asyncio.Future]] = {}
+    
+    def cog_unload(self):
+        """Detach the reply listener if games were still running"""
+        if self.active_games:
+            self.bot.remove_listener(self._on_game_reply, "on_message")
+    
+    async def _on_game_reply(self, message: discord.Message):
+        """Hand a player's message to the games waiting on it"""
+        for fut in self.active_games.get((message.channel.id, message.author.id), ()):
+            if not fut.done():
+                fut.set_result(message)
+    
+    async def _wait_for_reply(self, ctx: commands.Context, timeout: float) -> discord.Message:
+        """Wait for the command author's next message in the channel (raises asyncio.TimeoutError)"""
+        # The listener is only attached while a game is running, so idle
+        # messages don't pay for a dispatched task
+        if not self.active_games:
+            self.bot.add_listener(self._on_game_reply, "on_message")
+        
+        key = (ctx.channel.id, ctx.author.id)
+        fut = asyncio.get_running_loop().create_future()
+        waiters = self.active_games.setdefault(key, [])
+        waiters.append(fut)
+        try:
+            return await asyncio.wait_for(fut, timeout=timeout)
+        finally:
+            waiters.remove(fut)
+            if not waiters:
+                del self.active_games[key]
+                if not self.active_games:
+                    self.bot.remove_listener(self._on_game_reply, "on_message")
         
     @commands.command(name="joke")
     async def joke_command(self, ctx: commands.Context):
         """Tell a random joke"""
-        jokes = [
-            "Why don't scientists trust atoms? Because they make up everything!",
-            "Why did the scarecrow win an award? He was outstanding in his field!",
-            "Why don't eggs tell jokes? They'd crack each other up!",
-            "What do you call a fake noodle? An impasta!",
-            "Why did the math book look so sad? Because it had too many problems!",
-            "What do you call a bear with no teeth? A gummy bear!",
-            "Why don't skeletons fight each other? They don't have the guts!",
-            "What do you call a sleeping bull? A bulldozer!",
-            "Why did the coffee file a police report? It got mugged!",
-            "What's the best thing about Switzerland? I don't know, but the flag is a big plus!"
-        ]
-        
-        joke = random.choice(jokes)
+        joke = JOKES[self._rand.randrange(len(JOKES))]
         embed = discord.Embed(
             title="😂 Random Joke",
             description=joke,
@@ -45,27 +118,16 @@ class FunCommands(commands.Cog):
     @commands.command(name="fun")
     async def fun_command(self, ctx: commands.Context):
         """Random fun activities"""
-        activities = [
-            "🎲 Roll a dice: You got a **{}**!",
-            "🪙 Flip a coin: It's **{}**!",
-            "🌟 Your luck today: **{}**/10",
-            "🎯 Random fact: Did you know that honey never spoils?",
-            "🎯 Random fact: A group of flamingos is called a 'flamboyance'!",
-            "🎯 Random fact: Octopuses have three hearts!",
-            "🔮 Magic 8-Ball says: **{}**"
-        ]
-        
-        activity = random.choice(activities)
+        activity = ACTIVITIES[self._rand.randrange(len(ACTIVITIES))]
         
         if "dice" in activity:
-            result = activity.format(random.randint(1, 6))
+            result = activity.format(self._rand.randrange(6) + 1)
         elif "coin" in activity:
-            result = activity.format(random.choice(["Heads", "Tails"]))
+            result = activity.format(COIN_SIDES[self._rand.randrange(len(COIN_SIDES))])
         elif "luck" in activity:
-            result = activity.format(random.randint(1, 10))
+            result = activity.format(self._rand.randrange(10) + 1)
         elif "Magic 8-Ball" in activity:
-            responses = ["Yes", "No", "Maybe", "Ask again later", "Definitely", "Not likely", "Absolutely"]
-            result = activity.format(random.choice(responses))
+            result = activity.format(MAGIC8[self._rand.randrange(len(MAGIC8))])
         else:
             result = activity
         
@@ -105,47 +167,30 @@ class FunCommands(commands.Cog):
     
     async def start_trivia(self, ctx: commands.Context):
         """Start a trivia game"""
-        questions = [
-            {"q": "What is the capital of France?", "a": "paris"},
-            {"q": "What is 2 + 2?", "a": "4"},
-            {"q": "What planet is known as the Red Planet?", "a": "mars"},
-            {"q": "Who painted the Mona Lisa?", "a": "leonardo da vinci"},
-            {"q": "What is the largest ocean on Earth?", "a": "pacific"}
-        ]
-        
-        question = random.choice(questions)
+        question, answer_text = TRIVIA[self._rand.randrange(len(TRIVIA))]
         
         embed = discord.Embed(
             title="🧠 Trivia Question",
-            description=f"**{question['q']}**\n\nYou have 30 seconds to answer!",
+            description=f"**{question}**\n\nYou have 30 seconds to answer!",
             color=discord.Color.green()
         )
         await ctx.send(embed=embed)
         
-        def check(message):
-            return message.author == ctx.author and message.channel == ctx.channel
-        
         try:
-            answer = await self.bot.wait_for('message', timeout=30.0, check=check)
-            if answer.content.lower().strip() == question['a']:
+            answer = await self._wait_for_reply(ctx, 30.0)
+            if answer.content.strip().casefold() == answer_text:
                 await ctx.send("🎉 Correct! Well done!")
             else:
-                await ctx.send(f"❌ Wrong! The answer was: **{question['a']}**")
+                await ctx.send(f"❌ Wrong! The answer was: **{answer_text}**")
         except asyncio.TimeoutError:
-            await ctx.send(f"⏰ Time's up! The answer was: **{question['a']}**")
+            await ctx.send(f"⏰ Time's up! The answer was: **{answer_text}**")
     
     async def start_math_game(self, ctx: commands.Context):
         """Start a math game"""
-        num1 = random.randint(1, 50)
-        num2 = random.randint(1, 50)
-        operation = random.choice(['+', '-', '*'])
-        
-        if operation == '+':
-            answer = num1 + num2
-        elif operation == '-':
-            answer = num1 - num2
-        else:  # multiplication
-            answer = num1 * num2
+        num1 = self._rand.randrange(50) + 1
+        num2 = self._rand.randrange(50) + 1
+        operation, fn = _OPS[self._rand.randrange(len(_OPS))]
+        answer = fn(num1, num2)
         
         embed = discord.Embed(
             title="🔢 Math Challenge",
@@ -154,11 +199,8 @@ class FunCommands(commands.Cog):
         )
         await ctx.send(embed=embed)
         
-        def check(message):
-            return message.author == ctx.author and message.channel == ctx.channel
-        
         try:
-            user_answer = await self.bot.wait_for('message', timeout=30.0, check=check)
+            user_answer = await self._wait_for_reply(ctx, 30.0)
             if user_answer.content.strip() == str(answer):
                 await ctx.send("🎉 Correct! Great math skills!")
             else:
@@ -168,8 +210,7 @@ class FunCommands(commands.Cog):
     
     async def start_word_game(self, ctx: commands.Context):
         """Start a word association game"""
-        words = ["cat", "sun", "book", "music", "ocean", "mountain", "flower", "computer", "friendship", "adventure"]
-        word = random.choice(words)
+        word = WORDS[self._rand.randrange(len(WORDS))]
         
         embed = discord.Embed(
             title="💭 Word Association",
@@ -178,45 +219,31 @@ class FunCommands(commands.Cog):
         )
         await ctx.send(embed=embed)
         
-        def check(message):
-            return message.author == ctx.author and message.channel == ctx.channel
-        
         try:
-            response = await self.bot.wait_for('message', timeout=30.0, check=check)
+            response = await self._wait_for_reply(ctx, 30.0)
             await ctx.send(f"Nice association! **{word}** → **{response.content}** 🌟")
         except asyncio.TimeoutError:
             await ctx.send("⏰ Time's up! Maybe next time!")
     
     async def start_riddle_game(self, ctx: commands.Context):
         """Start a riddle game"""
-        riddles = [
-            {"q": "I speak without a mouth and hear without ears. I have no body, but come alive with wind. What am I?", "a": "echo"},
-            {"q": "The more you take, the more you leave behind. What am I?", "a": "footsteps"},
-            {"q": "I'm tall when I'm young, and short when I'm old. What am I?", "a": "candle"},
-            {"q": "What has keys but no locks, space but no room, and you can enter but not go inside?", "a": "keyboard"},
-            {"q": "What gets wetter as it dries?", "a": "towel"}
-        ]
-        
-        riddle = random.choice(riddles)
+        riddle, answer_text = RIDDLES[self._rand.randrange(len(RIDDLES))]
         
         embed = discord.Embed(
             title="🤔 Riddle Time",
-            description=f"**{riddle['q']}**\n\nYou have 60 seconds to think!",
+            description=f"**{riddle}**\n\nYou have 60 seconds to think!",
             color=discord.Color.purple()
         )
         await ctx.send(embed=embed)
         
-        def check(message):
-            return message.author == ctx.author and message.channel == ctx.channel
-        
         try:
-            answer = await self.bot.wait_for('message', timeout=60.0, check=check)
-            if riddle['a'].lower() in answer.content.lower():
+            answer = await self._wait_for_reply(ctx, 60.0)
+            if answer_text in answer.content.casefold():
                 await ctx.send("🎉 Excellent! You solved the riddle!")
             else:
-                await ctx.send(f"❌ Good try! The answer was: **{riddle['a']}**")
+                await ctx.send(f"❌ Good try! The answer was: **{answer_text}**")
         except asyncio.TimeoutError:
-            await ctx.send(f"⏰ Time's up! The answer was: **{riddle['a']}**")
+            await ctx.send(f"⏰ Time's up! The answer was: **{answer_text}**")
     
     @commands.command(name="guess")
     async def guess_command(self, ctx: commands.Context, max_num: int = 100):
@@ -225,7 +252,7 @@ class FunCommands(commands.Cog):
             await ctx.send("Please choose a number between 10 and 1000!")
             return
         
-        secret_number = random.randint(1, max_num)
+        secret_number = self._rand.randrange(max_num) + 1
         attempts = 0
         max_attempts = min(10, max_num // 10 + 3)
         
@@ -237,18 +264,18 @@ class FunCommands(commands.Cog):
         )
         await ctx.send(embed=embed)
         
-        def check(message):
-            return message.author == ctx.author and message.channel == ctx.channel
-        
         while attempts < max_attempts:
             try:
-                guess_msg = await self.bot.wait_for('message', timeout=30.0, check=check)
+                guess_msg = await self._wait_for_reply(ctx, 30.0)
                 
-                try:
-                    guess = int(guess_msg.content.strip())
-                except ValueError:
+                # Pre-filter chat noise instead of paying for a ValueError;
+                # max_num <= 1000 so anything longer can't be a valid guess
+                text = guess_msg.content.strip()
+                digits = text[1:] if text[:1] in ("-", "+") else text
+                if len(text) > 6 or not digits.isdecimal():
                     await ctx.send("Please enter a valid number!")
                     continue
+                guess = int(text)
                 
                 attempts += 1
                 
@@ -277,7 +304,7 @@ class FunCommands(commands.Cog):
             await ctx.send("Please choose between 2 and 100 sides!")
             return
         
-        result = random.randint(1, sides)
+        result = self._rand.randrange(sides) + 1
         embed = discord.Embed(
             title="🎲 Dice Roll",
             description=f"Rolling a {sides}-sided die...\n\n**Result: {result}**",
@@ -288,7 +315,7 @@ class FunCommands(commands.Cog):
     @commands.command(name="flip")
     async def flip_command(self, ctx: commands.Context):
         """Flip a coin"""
-        result = random.choice(["Heads", "Tails"])
+        result = COIN_SIDES[self._rand.randrange(len(COIN_SIDES))]
         emoji = "🟡" if result == "Heads" else "⚫"
         
         embed = discord.Embed(
@@ -5,168 +5,260 @@ OpenRouter API client for AI chat functionality
 import asyncio
 import json
 import logging
+import random
 import time
 from typing import List, Dict, Any, Optional
 import aiohttp
+import orjson
 from bot.config import BotConfig
+from bot.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+# Upper bound in seconds for a single retry backoff
+MAX_RETRY_DELAY = 60.0
+
+# Statuses worth retrying; anything else is a permanent failure
+RETRYABLE = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Timeouts applied to every OpenRouter request
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10, sock_read=30)
+
+def _server_retry_delay(headers) -> Optional[float]:
+    """Seconds until the server accepts requests again, from Retry-After or X-RateLimit-Reset"""
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass  # HTTP-date form; fall through to the reset header
+    
+    reset = headers.get("X-RateLimit-Reset")
+    if reset:
+        try:
+            reset_at = float(reset)
+        except ValueError:
+            return None
+        # OpenRouter sends the reset as epoch milliseconds
+        if reset_at > 1e11:
+            reset_at /= 1000
+        return max(reset_at - time.time(), 1.0)
+    
+    return None
+
+def create_http_session() -> aiohttp.ClientSession:
+    """Create an HTTP session whose connection pool keeps TCP+TLS connections alive for reuse"""
+    connector = aiohttp.TCPConnector(
+        limit=64,
+        limit_per_host=16,
+        ttl_dns_cache=300,
+        keepalive_timeout=60
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+
 class OpenRouterClient:
     """Client for interacting with OpenRouter API"""
     
-    def __init__(self, config: BotConfig):
+    def __init__(self, config: BotConfig, session: Optional[aiohttp.ClientSession] = None):
         self.config = config
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.request_times: List[float] = []
+        self.session: Optional[aiohttp.ClientSession] = session
+        # Sessions passed in are owned (and closed) by the caller
+        self._owns_session = session is None
+        self._chat_url = f"{config.openrouter_base_url}/chat/completions"
+        # Built once; passed per request since the session may be shared with other APIs
+        self._headers = {
+            "Authorization": f"Bearer {config.openrouter_api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://discord-ai-bot",
+            "X-Title": "Discord AI Bot"
+        }
+        # Request fields that don't change between calls
+        self._payload_template = {
+            "model": config.model_name,
+            "max_tokens": config.max_response_length,
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "stream": False
+        }
+        # Token bucket: rate_limit_requests tokens refilled over rate_limit_window seconds.
+        # _last_refill is a time.monotonic() reading, not comparable to wall-clock time.
+        self._capacity = float(config.rate_limit_requests)
+        self._tokens = self._capacity
+        # A non-positive request count or window disables client-side limiting
+        self._rate: Optional[float] = None
+        if config.rate_limit_requests > 0 and config.rate_limit_window > 0:
+            self._rate = config.rate_limit_requests / config.rate_limit_window
+        self._last_refill = time.monotonic()
+        # Serializes check/wait/consume so concurrent requests can't overdraw the bucket
+        self._rl_lock = asyncio.Lock()
+        # Caps requests in flight at once; retries wait for their backoff outside it
+        self._inflight = asyncio.Semaphore(config.max_concurrent_requests if config.max_concurrent_requests > 0 else 8)
+        self.response_cache = ResponseCache(config.response_cache_size, config.response_cache_ttl)
         
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession()
+        await self.create_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        await self.close_session()
     
     async def create_session(self):
         """Create HTTP session if not exists"""
         if not self.session:
-            self.session = aiohttp.ClientSession()
+            self.session = create_http_session()
+            self._owns_session = True
     
     async def close_session(self):
-        """Close HTTP session"""
-        if self.session:
+        """Close HTTP session if this client created it"""
+        if self.session and self._owns_session:
             await self.session.close()
-            self.session = None
+        self.session = None
+    
+    def _refill_tokens(self):
+        """Add the tokens earned since the last refill, up to the bucket capacity"""
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
     
     def _check_rate_limit(self) -> bool:
         """Check if we're within rate limits"""
-        current_time = time.time()
-        
-        # Remove old requests outside the window
-        self.request_times = [
-            req_time for req_time in self.request_times
-            if current_time - req_time < self.config.rate_limit_window
-        ]
-        
-        # Check if we can make another request
-        return len(self.request_times) < self.config.rate_limit_requests
+        if self._rate is None:
+            return True
+        self._refill_tokens()
+        return self._tokens >= 1
     
-    def _record_request(self):
-        """Record a new request timestamp"""
-        self.request_times.append(time.time())
+    def _consume_token(self):
+        """Spend a token for a new request"""
+        self._tokens -= 1
     
     async def _wait_for_rate_limit(self):
         """Wait until we can make another request"""
-        if not self.request_times:
-            return
-        
-        oldest_request = min(self.request_times)
-        wait_time = self.config.rate_limit_window - (time.time() - oldest_request)
+        wait_time = (1 - self._tokens) / self._rate
         
         if wait_time > 0:
-            logger.info(f"Rate limit reached, waiting {wait_time:.1f} seconds")
+            logger.info("Rate limit reached, waiting %.1f seconds", wait_time)
             await asyncio.sleep(wait_time)
+            self._refill_tokens()
+    
+    async def _acquire_slot(self):
+        """Wait for and take a rate limit token"""
+        if self._rate is None:
+            return
+        async with self._rl_lock:
+            if not self._check_rate_limit():
+                await self._wait_for_rate_limit()
+            self._consume_token()
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Capped exponential backoff with full jitter, so concurrent retries don't land in lockstep"""
+        return random.uniform(0, min(self.config.retry_delay_base * (2 ** attempt), MAX_RETRY_DELAY))
     
-    async def generate_response(
-        self, 
-        messages: List[Dict[str, str]], 
-        retry_count: int = 0
-    ) -> Optional[str]:
+    async def generate_response(self, messages: List[Dict[str, str]]) -> Optional[str]:
         """
         Generate AI response using OpenRouter API
         
         Args:
             messages: List of message dictionaries with 'role' and 'content'
-            retry_count: Current retry attempt
             
         Returns:
             Generated response string or None if failed
         """
+        # Local bindings for the logging calls made inside the retry loop
+        log_debug = logger.debug
+        log_warning = logger.warning
+        log_error = logger.error
+        
+        # Add system prompt if not present, leaving the caller's list untouched
+        if messages and messages[0].get("role") == "system":
+            final_messages = messages
+        else:
+            final_messages = [self.config.system_message, *messages]
+        
+        # Standalone questions and short conversations are answered from cache when possible
+        cache_key = ResponseCache.key_of(final_messages, self.config.system_prompt, self.config.model_name)
+        if cache_key is not None:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         await self.create_session()
         
-        # Check rate limits
-        if not self._check_rate_limit():
-            await self._wait_for_rate_limit()
+        payload = {**self._payload_template, "messages": final_messages}
+        # Encoded once; every retry sends the same bytes
+        body = orjson.dumps(payload)
         
-        try:
-            # Prepare the request
-            headers = {
-                "Authorization": f"Bearer {self.config.openrouter_api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://discord-ai-bot",
-                "X-Title": "Discord AI Bot"
-            }
-            
-            # Add system prompt if not present
-            if not messages or messages[0].get("role") != "system":
-                messages.insert(0, {
-                    "role": "system",
-                    "content": self.config.system_prompt
-                })
-            
-            payload = {
-                "model": self.config.model_name,
-                "messages": messages,
-                "max_tokens": self.config.max_response_length,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "stream": False
-            }
-            
-            self._record_request()
+        max_retries = self.config.max_retries
+        fallback = None
+        for attempt in range(max_retries + 1):
+            # Check rate limits
+            await self._acquire_slot()
             
-            async with self.session.post(
-                f"{self.config.openrouter_base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as response:
-                
-                if response.status == 200:
-                    data = await response.json()
+            delay = 0.0
+            try:
+                async with self._inflight, self.session.post(
+                    self._chat_url,
+                    headers=self._headers,
+                    data=body,
+                    timeout=REQUEST_TIMEOUT
+                ) as response:
                     
-                    if "choices" in data and data["choices"]:
-                        content = data["choices"][0]["message"]["content"]
-                        logger.info("Successfully generated AI response")
-                        return content.strip()
-                    else:
-                        logger.error("No choices in API response")
-                        return None
-                
-                elif response.status == 429:
-                    # Rate limited
-                    logger.warning(f"Rate limited by OpenRouter (429), retry {retry_count + 1}")
+                    if response.status == 200:
+                        # Parse the raw body directly rather than through aiohttp's stdlib json
+                        data = orjson.loads(await response.read())
+                        
+                        if "choices" in data and data["choices"]:
+                            content = data["choices"][0]["message"]["content"].strip()
+                            log_debug("Successfully generated AI response")
+                            if cache_key is not None:
+                                self.response_cache.set(cache_key, content)
+                            return content
+                        else:
+                            log_error("No choices in API response")
+                            return None
                     
-                    if retry_count < self.config.max_retries:
-                        delay = self.config.retry_delay_base * (2 ** retry_count)
-                        await asyncio.sleep(delay)
-                        return await self.generate_response(messages, retry_count + 1)
-                    else:
-                        logger.error("Max retries exceeded for rate limiting")
-                        return "Sorry, I'm currently rate limited. Please try again later."
-                
-                else:
-                    error_text = await response.text()
-                    logger.error(f"OpenRouter API error {response.status}: {error_text}")
+                    elif response.status == 429:
+                        # Rate limited
+                        log_warning("Rate limited by OpenRouter (429), retry %d", attempt + 1)
+                        fallback = "Sorry, I'm currently rate limited. Please try again later."
+                        if attempt == max_retries:
+                            log_error("Max retries exceeded for rate limiting")
+                        
+                        # Retry exactly when the server says it will be ready
+                        server_delay = _server_retry_delay(response.headers)
+                        if server_delay is not None:
+                            if server_delay > MAX_RETRY_DELAY:
+                                log_error("Rate limit resets in %.0fs, not retrying", server_delay)
+                                return fallback
+                            delay = server_delay + random.uniform(0, 0.5)
                     
-                    if retry_count < self.config.max_retries:
-                        delay = self.config.retry_delay_base * (2 ** retry_count)
-                        await asyncio.sleep(delay)
-                        return await self.generate_response(messages, retry_count + 1)
                     else:
-                        return f"Sorry, I encountered an error: {response.status}"
-        
-        except asyncio.TimeoutError:
-            logger.error("Request to OpenRouter API timed out")
-            if retry_count < self.config.max_retries:
-                return await self.generate_response(messages, retry_count + 1)
-            return "Sorry, the request timed out. Please try again."
+                        error_text = await response.text()
+                        log_error("OpenRouter API error %s: %s", response.status, error_text)
+                        fallback = f"Sorry, I encountered an error: {response.status}"
+                        if response.status not in RETRYABLE:
+                            return fallback
+                    
+                    if not delay:
+                        delay = self._backoff_delay(attempt)
+            
+            except asyncio.TimeoutError:
+                log_error("Request to OpenRouter API timed out")
+                fallback = "Sorry, the request timed out. Please try again."
+                delay = self._backoff_delay(attempt)
+            
+            except aiohttp.ClientConnectionError as e:
+                log_error("Connection to OpenRouter API failed: %s", e)
+                fallback = "Sorry, I couldn't reach the AI service. Please try again."
+                delay = self._backoff_delay(attempt)
+            
+            except Exception as e:
+                # Not transient; retrying would fail the same way
+                log_error("Error calling OpenRouter API: %s", e)
+                return f"Sorry, I encountered an unexpected error: {str(e)}"
+            
+            if delay and attempt < max_retries:
+                await asyncio.sleep(delay)
         
-        except Exception as e:
-            logger.error(f"Error calling OpenRouter API: {e}")
-            if retry_count < self.config.max_retries:
-                return await self.generate_response(messages, retry_count + 1)
-            return f"Sorry, I encountered an unexpected error: {str(e)}"
+        return fallback
@@ -0,0 +1,95 @@
+"""
+Redis-backed chat history shared across bot restarts and shards
+"""
+
+import json
+import logging
+from typing import Dict, List
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+# Prefix of every conversation key
+KEY_PREFIX = "chat:"
+
+# Keys fetched per SCAN round trip and deleted per UNLINK in clear_all
+_SCAN_BATCH = 500
+
+class RedisChatStore:
+    """Stores each conversation as a Redis list trimmed to the last N turns"""
+
+    def __init__(self, url: str, max_history: int = 20, ttl: int = 86400):
+        self.max_history = max_history
+        self.ttl = ttl
+        self.redis = redis.from_url(url)
+
+    @staticmethod
+    def _key(conv_id: int) -> str:
+        return f"{KEY_PREFIX}{conv_id}"
+
+    async def add(self, conv_id: int, role: str, content: str):
+        """
+        Append a message to a conversation
+
+        Args:
+            conv_id: Conversation ID (channel ID, or user ID for DMs)
+            role: Message role (user, assistant, system)
+            content: Message content
+        """
+        key = self._key(conv_id)
+        entry = json.dumps({"r": role, "c": content})
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.lpush(key, entry)
+            pipe.ltrim(key, 0, self.max_history - 1)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def get(self, conv_id: int) -> List[Dict[str, str]]:
+        """
+        Get a conversation formatted for API calls, oldest message first
+
+        Args:
+            conv_id: Conversation ID
+
+        Returns:
+            List of messages formatted for OpenRouter API
+        """
+        entries = await self.redis.lrange(self._key(conv_id), 0, self.max_history - 1)
+        messages = []
+        for entry in reversed(entries):
+            data = json.loads(entry)
+            messages.append({"role": data["r"], "content": data["c"]})
+        return messages
+
+    async def clear(self, conv_id: int):
+        """
+        Clear a conversation
+
+        Args:
+            conv_id: Conversation ID to clear
+        """
+        await self.redis.delete(self._key(conv_id))
+        logger.info(f"Cleared Redis history for conversation {conv_id}")
+
+    async def clear_all(self) -> int:
+        """
+        Clear every conversation
+
+        Returns:
+            Number of conversations removed
+        """
+        deleted = 0
+        batch = []
+        async for key in self.redis.scan_iter(match=f"{KEY_PREFIX}*", count=_SCAN_BATCH):
+            batch.append(key)
+            if len(batch) >= _SCAN_BATCH:
+                deleted += await self.redis.unlink(*batch)
+                batch.clear()
+        if batch:
+            deleted += await self.redis.unlink(*batch)
+        logger.info(f"Cleared {deleted} Redis conversations")
+        return deleted
+
+    async def close(self):
+        """Close the Redis connection pool"""
+        await self.redis.aclose()
@@ -0,0 +1,123 @@
+"""
+In-memory cache for AI responses to standalone prompts and short conversations
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Longest conversation (system prompt included) whose response is cached
+MAX_CACHED_MESSAGES = 4
+
+class ResponseCache:
+    """LRU cache with TTL expiry mapping hashed conversations to AI responses"""
+
+    def __init__(self, max_size: int = 256, ttl: float = 600):
+        self.max_size = max_size
+        self.ttl = ttl
+        # conversation digest -> (stored at, response)
+        self._entries: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        """
+        Canonicalize a prompt so the same question with a trailing "?" or stray
+        surrounding whitespace shares an entry. Case and inner whitespace are
+        kept, since code snippets and case-sensitive text depend on them.
+
+        Args:
+            prompt: Raw user prompt
+
+        Returns:
+            Prompt with surrounding whitespace and trailing punctuation removed
+        """
+        return prompt.strip().rstrip("?!. ")
+
+    @staticmethod
+    def prompt_of(messages: List[Dict[str, str]], system_prompt: str) -> Optional[str]:
+        """
+        Get the cacheable prompt of a conversation
+
+        Only standalone questions are cacheable: a single user turn, optionally
+        preceded by the default system prompt. Anything with history depends on
+        earlier turns and must go to the model.
+
+        Args:
+            messages: Messages about to be sent to the API
+            system_prompt: The bot's configured system prompt
+
+        Returns:
+            The user prompt, or None if the conversation isn't cacheable
+        """
+        if messages and messages[0].get("role") == "system":
+            if messages[0].get("content") != system_prompt:
+                return None
+            messages = messages[1:]
+
+        if len(messages) != 1 or messages[0].get("role") != "user":
+            return None
+        return messages[0].get("content")
+
+    @classmethod
+    def key_of(cls, messages: List[Dict[str, str]], system_prompt: str, model: str) -> Optional[bytes]:
+        """
+        Get the cache key of a conversation
+
+        Standalone questions are keyed by their normalized prompt so trailing
+        punctuation doesn't split entries. Other short conversations are keyed
+        by their exact messages; longer threads are too personal to be reused.
+
+        Args:
+            messages: Messages about to be sent to the API
+            system_prompt: The bot's configured system prompt
+            model: Model the messages are sent to
+
+        Returns:
+            Digest of the conversation, or None if it isn't cacheable
+        """
+        prompt = cls.prompt_of(messages, system_prompt)
+        if prompt is not None:
+            data = b"p:" + cls.normalize(prompt).encode()
+        elif len(messages) <= MAX_CACHED_MESSAGES:
+            data = b"m:" + orjson.dumps(messages)
+        else:
+            return None
+        return hashlib.blake2b(data + b"|" + model.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Conversation key from key_of
+
+        Returns:
+            Cached response, or None on a miss or expired entry
+        """
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        logger.debug("Response cache hit for key: %s", key.hex())
+        return entry[1]
+
+    def set(self, key: bytes, response: str):
+        """
+        Store a response, evicting the least recently used entry when full
+
+        Args:
+            key: Conversation key from key_of
+            response: AI response for the conversation
+        """
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -1,8 +1,11 @@
 # Deepseek Discord AI Chatbot
 import asyncio
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import aiohttp
 from dotenv import load_dotenv
 from bot.discord_client import DiscordBot
 from bot.config import BotConfig
@@ -10,15 +13,19 @@ from bot.config import BotConfig
 # Load environment variables
 load_dotenv()
 
-# Configure logging
+# Configure logging: handlers only enqueue records, a background thread writes them
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [logging.StreamHandler(), logging.FileHandler('bot.log')]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+
+log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('bot.log')
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers)
+log_listener.start()
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +33,28 @@ logger = logging.getLogger(__name__)
 if sys.platform.startswith('win'):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+# Prefer uvloop's faster event loop where it's installed (not available on Windows)
+try:
+    import uvloop
+    run = uvloop.run
+except ImportError:
+    run = asyncio.run
+
+async def preflight_openrouter(config: BotConfig):
+    """Check the OpenRouter API key while the bot connects to Discord; never raises"""
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            async with session.get(
+                f"{config.openrouter_base_url}/auth/key",
+                headers={"Authorization": f"Bearer {config.openrouter_api_key}"}
+            ) as response:
+                if response.status == 200:
+                    logger.info("OpenRouter API key verified")
+                else:
+                    logger.warning("OpenRouter preflight failed with status %s; AI replies may not work", response.status)
+    except Exception as e:
+        logger.warning("OpenRouter preflight check failed: %s", e)
+
 async def main():
     """Main function to start the Discord bot"""
     try:
@@ -43,19 +72,28 @@ async def main():
         
         logger.info("Starting Discord AI Chatbot...")
         
-        # Initialize and start the bot
+        # Initialize and start the bot, checking OpenRouter alongside the Discord handshake
+        # async with runs bot.close() on exit or cancellation, flushing queued channel writes
         bot = DiscordBot(config)
-        await bot.start(config.discord_token)
+        async with bot:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(preflight_openrouter(config))
+                tg.create_task(bot.start(config.discord_token))
         
     except KeyboardInterrupt:
         logger.info("Bot shutdown requested by user")
+    except ExceptionGroup as eg:
+        for e in eg.exceptions:
+            logger.error(f"Fatal error: {e}")
     except Exception as e:
         logger.error(f"Fatal error: {e}")
     finally:
         logger.info("Bot shutting down...")
+        # Drain queued records to the handlers before the process exits
+        log_listener.stop()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        run(main())
     except KeyboardInterrupt:
         print("\nBot stopped by user")